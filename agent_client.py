@@ -0,0 +1,49 @@
+"""
+agent_client
+------------
+Thin CLI client for `daemon.py`. Takes the same arguments as `main.py`
+and prints the same output, but sends the prompt to a running daemon
+over its Unix socket so no Gemini client has to be built per prompt.
+Falls back to running `main.py` in-process when no daemon is running.
+"""
+
+import json
+import os
+import socket
+import sys
+
+from config import DAEMON_SOCKET
+
+
+def send_request(socket_path: str, argv: list[str]) -> int:
+    """Streams one request's output to stdout and returns its exit code."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        conn.sendall(json.dumps({"id": 0, "argv": argv}).encode() + b"\n")
+        conn.shutdown(socket.SHUT_WR)
+
+        for line in conn.makefile("r", encoding="utf-8"):
+            event = json.loads(line)
+            if event["event"] == "output":
+                print(event["text"])
+                continue
+            if event["event"] == "error":
+                print(f"Error: {event['error']}", file=sys.stderr)
+            return event["exit"]
+    return 1
+
+
+def main():
+    socket_path = os.environ.get("AGENT_DAEMON_SOCKET", DAEMON_SOCKET)
+    if hasattr(socket, "AF_UNIX") and os.path.exists(socket_path):
+        try:
+            sys.exit(send_request(socket_path, sys.argv[1:]))
+        except (ConnectionRefusedError, FileNotFoundError):
+            pass  # stale socket left by a daemon that is no longer running
+
+    import main as agent_main
+    agent_main.main()
+
+
+if __name__ == "__main__":
+    main()
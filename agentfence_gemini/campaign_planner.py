@@ -0,0 +1,256 @@
+"""
+agentfence_gemini.campaign_planner
+----------------------------------
+Campaign planning for AgentFence probes with large or mutated payload
+sets. Payloads are clustered by MinHash/LSH so near-identical attacks
+share one representative. `PlannedProbe` wraps any AgentFence probe,
+sends one representative per cluster first, expands a cluster only when
+its representative succeeds, and stops the probe as soon as enough
+successful attacks confirm the vulnerability (by default the first,
+so it never runs more sessions than `BaseProbe.run`).
+"""
+
+import hashlib
+import random
+import re
+import time
+from itertools import combinations
+from typing import List, Optional
+
+from agentfence.connectors.base_agent import BaseAgent
+from agentfence.probes.base_probe import BaseProbe
+from agentfence.result import ProbeResult
+from agentfence_gemini.results_store import ResultsStore, evaluator_identity
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def shingles(text: str, k: int = 4) -> set[str]:
+    """Return the character k-shingles of `text` after normalizing case and whitespace."""
+    normalized = re.sub(r"\s+", " ", text.lower()).strip()
+    if len(normalized) <= k:
+        return {normalized}
+    return {normalized[i:i + k] for i in range(len(normalized) - k + 1)}
+
+
+class MinHasher:
+    """
+    Computes fixed-length MinHash signatures whose slot-wise agreement
+    estimates the Jaccard similarity of two shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+            for s in shingles(text)
+        ]
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in hashes)
+            for a, b in self.permutations
+        )
+
+
+def estimated_similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def cluster_payloads(
+    payloads: List[str],
+    threshold: float = 0.5,
+    num_perm: int = 64,
+    bands: int = 16,
+) -> List[List[str]]:
+    """
+    Groups near-duplicate payloads using MinHash signatures and LSH banding.
+
+    Args:
+        payloads (List[str]): Candidate attack prompts, in priority order.
+        threshold (float): Minimum estimated Jaccard similarity to merge two payloads.
+        num_perm (int): MinHash signature length; must be divisible by `bands`.
+        bands (int): Number of LSH bands used to find candidate pairs.
+
+    Returns:
+        List[List[str]]: Clusters in order of first appearance; the first
+        payload of each cluster is its representative.
+    """
+    unique = list(dict.fromkeys(payloads))
+    hasher = MinHasher(num_perm=num_perm)
+    signatures = [hasher.signature(p) for p in unique]
+    rows = num_perm // bands
+
+    parent = list(range(len(unique)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = {}
+    for index, signature in enumerate(signatures):
+        for band in range(bands):
+            key = (band, signature[band * rows:(band + 1) * rows])
+            buckets.setdefault(key, []).append(index)
+
+    for members in buckets.values():
+        for a, b in combinations(members, 2):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b and estimated_similarity(signatures[a], signatures[b]) >= threshold:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = {}
+    for index, payload in enumerate(unique):
+        clusters.setdefault(find(index), []).append(payload)
+    return list(clusters.values())
+
+
+class PlannedProbe(BaseProbe):
+    """
+    Wraps an AgentFence probe so its payloads are run cluster by cluster
+    instead of one by one.
+    """
+
+    def __init__(
+        self,
+        probe: BaseProbe,
+        payloads: Optional[List[str]] = None,
+        similarity_threshold: float = 0.5,
+        confirmations: int = 1,
+        num_perm: int = 64,
+        bands: int = 16,
+        store: Optional[ResultsStore] = None,
+    ):
+        """
+        Initializes the PlannedProbe.
+
+        Args:
+            probe (BaseProbe): The probe supplying payloads, expected behavior and evaluator.
+            payloads (Optional[List[str]]): Extra or mutated payloads to run instead of the probe's own.
+            similarity_threshold (float): Minimum estimated Jaccard similarity for two payloads to share a cluster.
+            confirmations (int): Successful attacks needed before the probe stops early. The
+                default of 1 stops at the first success, like `BaseProbe.run`; higher values
+                confirm a finding by expanding the successful cluster, at the cost of extra sessions.
+            num_perm (int): MinHash signature length.
+            bands (int): Number of LSH bands.
+            store (Optional[ResultsStore]): Records every interaction and supplies them again when resuming.
+        """
+        super().__init__(name=probe.name, description=probe.description, evaluator=probe.evaluator)
+        self.probe = probe
+        self.payloads = payloads
+        self.similarity_threshold = similarity_threshold
+        self.confirmations = confirmations
+        self.num_perm = num_perm
+        self.bands = bands
+        self.store = store
+
+        self.attempts = 0
+        self.sessions_run = 0
+        self.sessions_resumed = 0
+        self.payloads_skipped = 0
+        self.last_error = None
+
+    def create_payloads(self) -> List[str]:
+        if self.payloads:
+            return self.payloads
+        return self.probe.create_payloads() if not self.probe.payload else [self.probe.payload]
+
+    def get_expected_behavior(self, payload: str) -> str:
+        return self.probe.get_expected_behavior(payload)
+
+    def get_response(self, agent: BaseAgent, payload: str) -> str:
+        return self.probe.get_response(agent, payload)
+
+    def attempt(self, agent: BaseAgent, payload: str) -> tuple[bool, str]:
+        """Sends one payload and returns the evaluator's verdict with the response."""
+        self.attempts += 1
+        if self.store is not None:
+            completed = self.store.lookup(self.name, payload, evaluator_identity(self.evaluator))
+            if completed is not None:
+                self.info(f"Reusing stored result for payload: '{payload}'")
+                self.sessions_resumed += 1
+                self.store.record(self.name, payload, completed["response"], completed["verdict"],
+                                  completed["prompt_tokens"], completed["response_tokens"],
+                                  completed["latency_ms"], evaluator_identity(self.evaluator),
+                                  resumed=True)
+                return bool(completed["verdict"]), completed["response"]
+
+        self.info(f"Attempting probe with payload: '{payload}'")
+        self.sessions_run += 1
+        start = time.perf_counter()
+        response = self.get_response(agent, payload)
+        latency_ms = (time.perf_counter() - start) * 1000
+        is_positive = self.evaluator.judge(payload, response, self.get_expected_behavior(payload))
+        if self.store is not None:
+            self.store.record(self.name, payload, response, is_positive,
+                              getattr(agent, "last_prompt_tokens", None),
+                              getattr(agent, "last_response_tokens", None),
+                              latency_ms, evaluator_identity(self.evaluator))
+        if not is_positive:
+            self.debug(f"Payload failed: {payload}. Response: {response}")
+        return is_positive, response
+
+    def run(self, agent: BaseAgent) -> ProbeResult:
+        """
+        Runs the probe against the given agent, one representative per
+        cluster first and cluster members only after a representative succeeds.
+
+        Args:
+            agent (BaseAgent): The agent to probe.
+
+        Returns:
+            ProbeResult: The result of the probe.
+        """
+        self.attempts = 0
+        self.sessions_run = 0
+        self.sessions_resumed = 0
+        self.payloads_skipped = 0
+        self.last_error = None
+        try:
+            payloads = self.create_payloads()
+            clusters = cluster_payloads(payloads, self.similarity_threshold, self.num_perm, self.bands)
+            self.info(f"Planned {len(payloads)} payloads into {len(clusters)} clusters")
+
+            successes = []
+            response = None
+            for cluster in clusters:
+                is_positive, response = self.attempt(agent, cluster[0])
+                if not is_positive:
+                    continue
+                successes.append(response)
+
+                for member in cluster[1:]:
+                    if len(successes) >= self.confirmations:
+                        break
+                    is_positive, response = self.attempt(agent, member)
+                    if is_positive:
+                        successes.append(response)
+
+                if len(successes) >= self.confirmations:
+                    self.info(f"Probe confirmed after {self.attempts} attempts, stopping early")
+                    break
+
+            self.payloads_skipped = len(payloads) - self.attempts
+            if self.store is not None:
+                self.store.flush()
+            if successes:
+                return self.default_result(success=True,
+                                           details=f"Probe detected in {len(successes)} of {self.attempts} attempts.",
+                                           evidence=successes[0])
+
+            self.info(f"All probe attempts failed")
+            return self.default_result(success=False,
+                                       details=f"No probe detected.",
+                                       evidence=response)
+
+        except Exception as e:
+            # Kept so the campaign is not marked complete and can be resumed
+            self.last_error = e
+            self.error(f"Error during probe execution: {e}")
+            return self.default_result(success=False, details=f"Error during probe execution: {e}")
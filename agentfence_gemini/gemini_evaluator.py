@@ -11,6 +11,7 @@ import os
 from google import genai
 from agentfence.evaluators.base_evaluator import BaseEvaluator
 from dotenv import load_dotenv
+from profiling import profiled
 
 
 class GeminiEvaluator(BaseEvaluator):
@@ -33,6 +34,7 @@ class GeminiEvaluator(BaseEvaluator):
             raise ValueError("Gemini API key not provided and GEMINI_API_KEY environment variable not set.")
         self.client = genai.Client(api_key=self.api_key)
 
+    @profiled("judge")
     def judge(self, prompt: str, response: str, expected: str) -> bool:
         """
         Judges if the response indicates a successful probe.
@@ -15,7 +15,10 @@ from functions.get_files_info import schema_get_files_info
 from functions.get_file_content import schema_get_file_content
 from functions.write_file import schema_write_file
 from functions.run_python_file import schema_run_python_file
-from call_function import call_function
+from functions.get_tool_result import schema_get_tool_result
+from result_shaping import TurnBudget
+from session_monitor import SessionMonitor
+from profiling import PROFILER, profiled
 
 
 class CodingAgent:
@@ -50,7 +53,8 @@ class CodingAgent:
                 schema_get_files_info,
                 schema_get_file_content,
                 schema_write_file,
-                schema_run_python_file
+                schema_run_python_file,
+                schema_get_tool_result
             ]
         )
         
@@ -58,27 +62,40 @@ class CodingAgent:
             tools=[self.available_functions],
             system_instruction=self.system_instructions
         )
+
+        # Token usage of the most recent send_message() session
+        self.last_prompt_tokens = 0
+        self.last_response_tokens = 0
     
     def introduce_self(self) -> str:
         """Required by AgentFence - returns agent description"""
         return f"Gemini Coding Agent using {self.model} with file operations and Python execution capabilities"
     
+    @profiled("session")
     def send_message(self, user_input: str, verbose: bool = False) -> str:
         """AgentFence interface method - takes user input and returns agent response"""
         messages = [
             types.Content(role='user', parts=[types.Part(text=user_input)]),
         ]
+        self.last_prompt_tokens = 0
+        self.last_response_tokens = 0
         
+        monitor = SessionMonitor()
         for i in range(MAX_ITERS):
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=messages,
-                config=self.config
-            )
+            PROFILER.mark_iteration(i + 1, messages)
+            with PROFILER.section("model"):
+                response = self.client.models.generate_content(
+                    model=self.model,
+                    contents=messages,
+                    config=self.config
+                )
             
             if response is None or response.usage_metadata is None:
                 return "Error: Response is malformed"
             
+            self.last_prompt_tokens += response.usage_metadata.prompt_token_count or 0
+            self.last_response_tokens += response.usage_metadata.candidates_token_count or 0
+            
             if verbose:
                 print(f"Iteration {i+1}/{MAX_ITERS}")
                 print(f"Prompt tokens: {response.usage_metadata.prompt_token_count}")
@@ -91,9 +108,12 @@ class CodingAgent:
                     messages.append(candidate.content)
             
             if response.function_calls:
+                budget = TurnBudget()
                 for function_call_part in response.function_calls:
-                    result = call_function(function_call_part, verbose)
+                    result = monitor.call(function_call_part, verbose, budget)
                     messages.append(result)
+                if monitor.stop_reason:
+                    return f"Error: Session stopped early: {monitor.stop_reason}"
             else:
                 return response.text
         
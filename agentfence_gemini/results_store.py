@@ -0,0 +1,247 @@
+"""
+agentfence_gemini.results_store
+-------------------------------
+SQLite-backed store for probe interactions. Every prompt sent during a
+campaign is recorded with the agent response, verdict, token counts,
+latency, model, evaluator and a hash of the system instructions.
+Writes are buffered and committed in batches. Every run starts fresh
+unless it is asked to resume: a resumed run reuses the interactions
+recorded, by the same evaluator, in the runs with the same model and
+system instructions that started after the last one that completed,
+instead of calling the agent again. Completed runs can be compared for regressions.
+"""
+
+import hashlib
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    model TEXT NOT NULL,
+    instructions_hash TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running'
+);
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    probe TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT,
+    verdict INTEGER NOT NULL,
+    prompt_tokens INTEGER,
+    response_tokens INTEGER,
+    latency_ms REAL,
+    model TEXT NOT NULL,
+    instructions_hash TEXT NOT NULL,
+    evaluator TEXT NOT NULL DEFAULT '',
+    resumed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release, created on databases that predate them
+MIGRATIONS = (
+    ("runs", "status", "TEXT NOT NULL DEFAULT 'complete'"),
+    ("interactions", "evaluator", "TEXT NOT NULL DEFAULT ''"),
+)
+
+INDEXES = """
+DROP INDEX IF EXISTS idx_interactions_config;
+CREATE INDEX IF NOT EXISTS idx_interactions_resume
+    ON interactions (model, instructions_hash, probe, evaluator, prompt, run_id);
+CREATE INDEX IF NOT EXISTS idx_interactions_run
+    ON interactions (run_id, probe, prompt);
+"""
+
+COLUMNS = (
+    "run_id", "probe", "prompt", "response", "verdict", "prompt_tokens", "response_tokens",
+    "latency_ms", "model", "instructions_hash", "evaluator", "resumed", "created_at",
+)
+
+
+def instructions_hash(system_instructions: str) -> str:
+    return hashlib.sha256((system_instructions or "").encode()).hexdigest()
+
+
+def evaluator_identity(evaluator) -> str:
+    """Name and model of an evaluator; interactions are only reused by the same one."""
+    return f"{evaluator.name}:{getattr(evaluator, 'model', None)}"
+
+
+class ResultsStore:
+    """
+    Persists probe interactions to SQLite and answers resume and
+    regression queries for campaigns.
+    """
+
+    def __init__(self, path: str = "results.db", batch_size: int = 10):
+        """
+        Initializes the ResultsStore.
+
+        Args:
+            path (str): SQLite database file; created if missing.
+            batch_size (int): Number of buffered interactions committed per transaction.
+        """
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.migrate()
+        self.batch_size = batch_size
+        self.pending = []
+        self.run_id = None
+        self.resume_from = None
+        self.model = None
+        self.instructions_hash = None
+
+    def migrate(self) -> None:
+        """Adds columns missing from databases created by older versions and (re)builds the indexes."""
+        with self.conn:
+            for table, column, definition in MIGRATIONS:
+                existing = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        self.conn.executescript(INDEXES)
+
+    def start_run(self, model: str, system_instructions: str, resume: bool = False) -> int:
+        """
+        Registers a new campaign run and makes it the target of `record()`.
+
+        Args:
+            model (str): Model under test.
+            system_instructions (str): System instructions of the agent under test.
+            resume (bool): If True, `lookup()` also serves interactions from the
+                interrupted runs with the same configuration since the last completed one.
+
+        Returns:
+            int: The id of the new run.
+        """
+        self.flush()
+        self.model = model
+        self.instructions_hash = instructions_hash(system_instructions)
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (started_at, model, instructions_hash) VALUES (?, ?, ?)",
+                (time.time(), self.model, self.instructions_hash),
+            )
+        self.run_id = cursor.lastrowid
+        self.resume_from = self.run_id
+        if resume:
+            row = self.conn.execute(
+                """SELECT MAX(id) AS id FROM runs
+                   WHERE model = ? AND instructions_hash = ? AND status = 'complete'""",
+                (self.model, self.instructions_hash),
+            ).fetchone()
+            self.resume_from = (row["id"] or 0) + 1
+        return self.run_id
+
+    def complete_run(self) -> None:
+        """Commits the current run and marks it complete, so it is never resumed."""
+        self.flush()
+        with self.conn:
+            self.conn.execute("UPDATE runs SET status = 'complete' WHERE id = ?", (self.run_id,))
+
+    def lookup(self, probe: str, prompt: str, evaluator: str = ""):
+        """
+        Finds an interaction to reuse: one already recorded in the current
+        run or, when resuming, in the interrupted runs before it. Only
+        interactions judged by `evaluator` match.
+
+        Returns:
+            sqlite3.Row | dict | None: The most recent matching interaction, or None.
+        """
+        for row in reversed(self.pending):
+            if row["probe"] == probe and row["prompt"] == prompt and row["evaluator"] == evaluator:
+                return row
+        return self.conn.execute(
+            """SELECT * FROM interactions
+               WHERE model = ? AND instructions_hash = ? AND probe = ? AND evaluator = ?
+                 AND prompt = ? AND run_id >= ?
+               ORDER BY id DESC LIMIT 1""",
+            (self.model, self.instructions_hash, probe, evaluator, prompt, self.resume_from),
+        ).fetchone()
+
+    def record(
+        self,
+        probe: str,
+        prompt: str,
+        response: str,
+        verdict: bool,
+        prompt_tokens: int = None,
+        response_tokens: int = None,
+        latency_ms: float = None,
+        evaluator: str = "",
+        resumed: bool = False,
+    ) -> None:
+        """Buffers one interaction for the current run, committing when the batch is full."""
+        if self.run_id is None:
+            raise ValueError("start_run() must be called before recording interactions")
+        self.pending.append({
+            "run_id": self.run_id,
+            "probe": probe,
+            "prompt": prompt,
+            "response": response,
+            "verdict": int(bool(verdict)),
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": response_tokens,
+            "latency_ms": latency_ms,
+            "model": self.model,
+            "instructions_hash": self.instructions_hash,
+            "evaluator": evaluator,
+            "resumed": int(resumed),
+            "created_at": time.time(),
+        })
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commits all buffered interactions in a single transaction."""
+        if not self.pending:
+            return
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO interactions ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row[c] for c in COLUMNS) for row in self.pending],
+            )
+        self.pending = []
+
+    def previous_run(self, run_id: int = None):
+        """Returns the id of the last completed run started before `run_id` (default: the current run), or None."""
+        row = self.conn.execute(
+            "SELECT id FROM runs WHERE id < ? AND status = 'complete' ORDER BY id DESC LIMIT 1",
+            (run_id or self.run_id,),
+        ).fetchone()
+        return row["id"] if row else None
+
+    def regressions(self, old_run: int, new_run: int) -> list:
+        """Interactions that were safe in `old_run` but judged vulnerable in `new_run`."""
+        self.flush()
+        return self.conn.execute(
+            """SELECT new.probe, new.prompt, new.response
+               FROM interactions AS new
+               JOIN interactions AS old
+                 ON old.run_id = ? AND old.probe = new.probe AND old.prompt = new.prompt
+               WHERE new.run_id = ? AND new.verdict = 1 AND old.verdict = 0
+               ORDER BY new.probe, new.id""",
+            (old_run, new_run),
+        ).fetchall()
+
+    def run_summary(self, run_id: int = None) -> list:
+        """Per-probe interaction, vulnerability, resume and token totals for a run."""
+        self.flush()
+        return self.conn.execute(
+            """SELECT probe, COUNT(*) AS interactions, SUM(verdict) AS vulnerable,
+                      SUM(resumed) AS resumed,
+                      SUM(COALESCE(prompt_tokens, 0) + COALESCE(response_tokens, 0)) AS tokens,
+                      AVG(latency_ms) AS avg_latency_ms
+               FROM interactions WHERE run_id = ? GROUP BY probe ORDER BY probe""",
+            (run_id or self.run_id,),
+        ).fetchall()
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
@@ -5,60 +5,88 @@ Small adapter that maps declarative function-call objects from the
 Gemini/AgentFence flow into local Python utilities in `functions/`.
 Keeps a single `working_directory` for all operations and returns a
 `google.genai.types.Content` object containing the tool result or an
-error string.
+error string. Results are shaped to the size budget in
+`result_shaping` before they are returned.
 """
 
 from functions.get_files_info import get_files_info
 from functions.get_file_content import get_file_content
 from functions.write_file import write_file
 from functions.run_python_file import run_python_file
+from functions.get_tool_result import get_tool_result
+from result_shaping import TurnBudget
+from profiling import PROFILER
 from google.genai import types
 
 working_directory = "calculator"
 
 
-def call_function(function_call_part, verbose=False):
+def call_function(function_call_part, verbose=False, budget=None):
     """Invoke a named tool using the shared working directory.
 
     Args:
         function_call_part: The function-call object returned by the LLM.
         verbose (bool): If True, prints extra debugging information.
+        budget (TurnBudget, optional): Result size budget shared by the
+            calls of one model turn. A fresh budget is used if omitted.
 
     Returns:
         types.Content: A tool response wrapper with either a result or error.
     """
+    budget = budget or TurnBudget()
+    result = run_tool(function_call_part, verbose, budget)
+    return tool_content(function_call_part.name, result, budget)
+
+
+def run_tool(function_call_part, verbose=False, budget=None) -> str:
+    """Runs a tool and returns its full result string ("" for an unknown tool)."""
     if verbose:
         print(f"Calling function: {function_call_part.name}({function_call_part.args})")
     else:
         print(f" - Calling function: {function_call_part.name}")
     
+    budget = budget or TurnBudget()
     result = ""
-    if function_call_part.name == "get_files_info":
-        result = get_files_info(working_directory, **function_call_part.args)
-    if function_call_part.name == "get_file_content":
-        result = get_file_content(working_directory, **function_call_part.args)
-    if function_call_part.name == "write_file":
-        result = write_file(working_directory, **function_call_part.args)
-    if function_call_part.name == "run_python_file":
-        result = run_python_file(working_directory, **function_call_part.args)
+    with PROFILER.section(f"tool:{function_call_part.name}"):
+        if function_call_part.name == "get_files_info":
+            result = get_files_info(working_directory, **function_call_part.args)
+        if function_call_part.name == "get_file_content":
+            result = get_file_content(working_directory, **function_call_part.args)
+        if function_call_part.name == "write_file":
+            result = write_file(working_directory, **function_call_part.args)
+        if function_call_part.name == "run_python_file":
+            result = run_python_file(working_directory, **function_call_part.args)
+        if function_call_part.name == "get_tool_result":
+            # Pages are sized to what is left of the turn's budget
+            result = get_tool_result(**{**function_call_part.args, "limit": budget.limit})
+    return result
 
+
+def tool_content(name: str, result: str, budget=None) -> types.Content:
+    """Wraps a full tool result, shaped to `budget`, as a tool response."""
     if result == "":
         return types.Content(
             role="tool",
             parts=[
                 types.Part.from_function_response(
-                    name=function_call_part.name,
-                    response={"error": f"Unknown function: {function_call_part.name}"},
+                    name=name,
+                    response={"error": f"Unknown function: {name}"},
                 )
             ],
         )
-    
+
+    budget = budget or TurnBudget()
+    if name == "get_tool_result":
+        result = budget.charge(result)
+    else:
+        result = budget.shape(name, result)
+
     return types.Content(
         role="tool",
         parts=[
             types.Part.from_function_response(
-                name=function_call_part.name,
+                name=name,
                 response={"result": result},
             )
         ],
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,141 @@
+"""
+checkpoint
+----------
+Append-only checkpoints for in-flight agent sessions. After every loop
+iteration the new `messages` entries and the contents of the files the
+session's `write_file` calls touched are appended as one gzip member to
+`<session_id>.jsonl.gz`, so a session that dies mid-run can be resumed
+from its last completed iteration without repeating any model calls.
+Before an iteration writes, the current contents of its targets are
+recorded so a partial iteration can be rolled back; files the session
+never wrote are left alone, since daemon sessions share the workspace.
+A torn final member left by a crash is dropped on load, and the
+checkpoint is deleted once the session finishes.
+"""
+
+import gzip
+import json
+import os
+import uuid
+import zlib
+
+from config import CHECKPOINT_DIR
+from functions.workspace import get_workspace, WorkspaceError
+from google.genai import types
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+class SessionCheckpoint:
+    """
+    Incremental on-disk record of one agent session: its messages, the
+    number of completed iterations and the last checkpointed contents of
+    the files it wrote. Changes made by `run_python_file` are not tracked.
+    """
+
+    def __init__(self, session_id: str, workspace: str, directory: str = CHECKPOINT_DIR):
+        self.session_id = session_id
+        self.workspace = get_workspace(workspace)
+        self.path = os.path.join(directory, f"{session_id}.jsonl.gz")
+        os.makedirs(directory, exist_ok=True)
+
+        self.messages = []
+        self.iterations = 0
+        self.files = {}
+        self.pending = []
+        self.saved_messages = 0
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def _append(self, record: dict, path: str = None) -> None:
+        # Each record is its own gzip member, so appends never rewrite earlier data
+        with gzip.open(path or self.path, "ab") as f:
+            f.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+
+    def _contents(self, paths) -> dict:
+        """Current text of each file in `paths` (None if absent), keyed by workspace-relative path."""
+        contents = {}
+        for path in paths:
+            try:
+                relpath = self.workspace.relpath(path)
+                contents[relpath] = self.workspace.read_text(relpath) if self.workspace.is_file(relpath) else None
+            except (WorkspaceError, OSError, ValueError):
+                continue  # write_file refuses these too, or the file cannot be restored as text
+        return contents
+
+    def start(self, messages: list) -> None:
+        """Writes the session header with the initial messages."""
+        self._append({
+            "iteration": 0,
+            "messages": [m.model_dump(mode="json", exclude_none=True) for m in messages],
+            "files": {},
+        })
+        self.saved_messages = len(messages)
+
+    def begin_writes(self, paths: list) -> None:
+        """Records the contents of files the next iteration is about to write, before it writes them."""
+        self.pending = list(paths)
+        if self.pending:
+            self._append({"before": self._contents(self.pending)})
+
+    def save_iteration(self, iteration: int, messages: list) -> None:
+        """Appends the messages and written files produced by a completed iteration."""
+        self._append({
+            "iteration": iteration,
+            "messages": [m.model_dump(mode="json", exclude_none=True) for m in messages[self.saved_messages:]],
+            "files": self._contents(self.pending),
+        })
+        self.saved_messages = len(messages)
+        self.pending = []
+
+    def finish(self) -> None:
+        """Deletes the checkpoint of a session that has produced its final response."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def load(self) -> None:
+        """Replays all complete records into `messages`, `iterations` and `files`."""
+        records = []
+        try:
+            with gzip.open(self.path, "rb") as f:
+                for line in f:
+                    records.append(json.loads(line))
+        except (EOFError, zlib.error, json.JSONDecodeError, gzip.BadGzipFile):
+            # Torn tail from a crash mid-append: keep the complete records
+            # and drop the tail so later appends stay readable
+            if not records:
+                os.remove(self.path)
+                return
+            tmp_path = self.path + ".tmp"
+            for record in records:
+                self._append(record, tmp_path)
+            os.replace(tmp_path, self.path)
+
+        for record in records:
+            if "before" in record:
+                # Contents as of the last completed iteration; later records win
+                for path, text in record["before"].items():
+                    self.files.setdefault(path, text)
+                continue
+            self.messages.extend(types.Content.model_validate(m) for m in record["messages"])
+            self.iterations = record["iteration"]
+            self.files.update(record["files"])
+        self.saved_messages = len(self.messages)
+
+    def restore_workspace(self) -> None:
+        """Rolls the files this session wrote back to their last checkpointed contents."""
+        for path, text in self.files.items():
+            try:
+                exists = self.workspace.is_file(path)
+                if text is None:
+                    if exists:
+                        self.workspace.remove(path)
+                elif not exists or self.workspace.read_text(path) != text:
+                    self.workspace.write_text(path, text)
+            except (WorkspaceError, OSError, ValueError) as e:
+                print(f"Could not restore {path}: {e}")
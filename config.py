@@ -1,2 +1,19 @@
 MAX_CHARS = 10000
-MAX_ITERS = 20
\ No newline at end of file
+MAX_ITERS = 20
+CHECKPOINT_DIR = ".checkpoints"
+DAEMON_SOCKET = ".agent.sock"
+
+# Tool result budgets in characters (roughly 4 characters per token)
+RESULT_CALL_BUDGET = 4000
+RESULT_TURN_BUDGET = 12000
+RESULT_STORE_SIZE = 256
+
+# Stall detection: repeated or no-op tool calls tolerated without a
+# workspace change before STALL_POLICY ("warn" or "stop") applies
+STALL_LIMIT = 3
+STALL_POLICY = "warn"
+
+# --profile output directory, sampling interval (seconds) and report size
+PROFILE_DIR = ".profiles"
+PROFILE_INTERVAL = 0.005
+PROFILE_TOP_N = 15
@@ -0,0 +1,200 @@
+"""
+daemon
+------
+Long-lived server that keeps a pool of ready `CodingAgent` instances so
+each prompt only pays for model latency. The Gemini client, tools and
+`GenerateContentConfig` are built once and shared by every agent in
+the pool. Requests are JSON lines read from a Unix socket (default) or
+from stdin with `--stdin`; they run concurrently and their printed
+output and final response are streamed back as JSON lines tagged with
+the request id.
+
+Request:  {"id": 1, "argv": ["<prompt>", "--verbose"]}
+      or  {"id": 1, "prompt": "<prompt>", "verbose": false, "session": null}
+Events:   {"id": 1, "event": "output", "text": " - Calling function: get_files_info"}
+          {"id": 1, "event": "response", "text": "...", "exit": 0}
+          {"id": 1, "event": "exit", "exit": 1}            (invalid arguments)
+          {"id": 1, "event": "error", "error": "...", "exit": 1}
+"""
+
+import copy
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dotenv import load_dotenv
+from config import DAEMON_SOCKET
+from main import CodingAgent, parse_args
+
+
+class ThreadStdout:
+    """
+    Stand-in for `sys.stdout` that routes each thread's prints to the
+    request it is serving, so tool-call logs reach the right client.
+    """
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def write(self, text: str) -> int:
+        sink = getattr(self.local, "sink", None)
+        if sink is None:
+            return self.default.write(text)
+        sink(text)
+        return len(text)
+
+    def flush(self) -> None:
+        self.default.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+
+class AgentPool:
+    """
+    A fixed set of `CodingAgent` copies sharing one client and config,
+    with a thread pool that runs requests on them concurrently.
+    """
+
+    def __init__(self, size: int = 4):
+        load_dotenv()
+        template = CodingAgent(api_key=os.environ.get("GEMINI_API_KEY"))
+        self.agents = queue.Queue()
+        for _ in range(size):
+            self.agents.put(copy.copy(template))
+        self.executor = ThreadPoolExecutor(max_workers=size)
+
+    def submit(self, line: str, emit):
+        return self.executor.submit(self.handle, line, emit)
+
+    def handle(self, line: str, emit) -> None:
+        """Runs one JSON request line, streaming its events through `emit`."""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            emit({"id": None, "event": "error", "error": f"Invalid request: {e}", "exit": 1})
+            return
+        request_id = request.get("id")
+
+        buffer = []
+
+        def sink(text):
+            buffer.append(text)
+            if "\n" in text:
+                lines = "".join(buffer).split("\n")
+                buffer[:] = [lines.pop()]
+                for output in lines:
+                    emit({"id": request_id, "event": "output", "text": output})
+
+        def flush_output():
+            if "".join(buffer):
+                sink("\n")
+
+        sys.stdout.local.sink = sink
+        agent = self.agents.get()
+        try:
+            if "argv" in request:
+                prompt, verbose, session_id = parse_args(["main.py"] + request["argv"])
+            else:
+                prompt = request["prompt"]
+                verbose = request.get("verbose", False)
+                session_id = request.get("session")
+            text = agent.query(user_prompt=prompt, verbose=verbose, session_id=session_id)
+            flush_output()
+            emit({"id": request_id, "event": "response", "text": text, "exit": 0})
+        except SystemExit as e:
+            flush_output()
+            emit({"id": request_id, "event": "exit", "exit": e.code})
+        except Exception as e:
+            flush_output()
+            emit({"id": request_id, "event": "error", "error": str(e), "exit": 1})
+        finally:
+            self.agents.put(agent)
+            sys.stdout.local.sink = None
+
+
+def make_emitter(stream, binary: bool = False):
+    """Returns a thread-safe function writing one event per JSON line to `stream`."""
+    lock = threading.Lock()
+
+    def emit(event):
+        data = json.dumps(event) + "\n"
+        with lock:
+            stream.write(data.encode() if binary else data)
+            stream.flush()
+
+    return emit
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        emit = make_emitter(self.wfile, binary=True)
+        futures = [self.server.pool.submit(line.decode(), emit) for line in self.rfile if line.strip()]
+        wait(futures)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, pool: AgentPool):
+        self.pool = pool
+        super().__init__(path, RequestHandler)
+
+
+def daemon_running(path: str) -> bool:
+    """True if a daemon accepts connections on `path`; a stale socket file is removed."""
+    if not os.path.exists(path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return False
+    return True
+
+
+def serve_stdin(pool: AgentPool, out) -> None:
+    emit = make_emitter(out)
+    futures = [pool.submit(line, emit) for line in sys.stdin if line.strip()]
+    wait(futures)
+
+
+def main():
+    workers = 4
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    socket_path = DAEMON_SOCKET
+    if "--socket" in sys.argv:
+        socket_path = sys.argv[sys.argv.index("--socket") + 1]
+
+    if "--stdin" not in sys.argv and daemon_running(socket_path):
+        print(f"Error: daemon already running on {socket_path}", file=sys.stderr)
+        sys.exit(1)
+
+    # Protocol output owns the real stdout; stray prints go to stderr
+    out = sys.stdout
+    sys.stdout = ThreadStdout(sys.stderr if "--stdin" in sys.argv else out)
+    pool = AgentPool(size=workers)
+
+    if "--stdin" in sys.argv:
+        serve_stdin(pool, out)
+        return
+
+    with DaemonServer(socket_path, pool) as server:
+        print(f"Serving {workers} agents on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,30 +6,23 @@ working directory. Ensures reads are constrained to the working
 directory for safety and returns errors as strings on failure.
 """
 
-import os
-
 from config import MAX_CHARS
+from functions.workspace import get_workspace, WorkspaceError
 from google.genai import types
 
 def get_file_content(working_directory, file_path):
-    abs_working_dir = os.path.abspath(working_directory)
-    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
-    if not abs_file_path.startswith(abs_working_dir):
-        return f'Error: "{file_path}" is not in the working dir'
-    if not os.path.isfile(abs_file_path):
-        return f'Error: "{file_path}" is not a file'
-    
-    file_content_string = ""
     try:
-        with open(abs_file_path, "r") as f:
-            file_content_string = f.read(MAX_CHARS)
-            if len(file_content_string) >= MAX_CHARS:
-                file_content_string += f' [...File "{file_path}" truncated at 10000 characters]\n'
-
-        return file_content_string
-    
+        file_content_string = get_workspace(working_directory).read_file(file_path, MAX_CHARS)
+    except WorkspaceError:
+        return f'Error: "{file_path}" is not in the working dir'
     except Exception as e:
         return f'Exception reading file "{e}"'
+    if file_content_string is None:
+        return f'Error: "{file_path}" is not a file'
+
+    if len(file_content_string) >= MAX_CHARS:
+        file_content_string += f' [...File "{file_path}" truncated at 10000 characters]\n'
+    return file_content_string
 
 schema_get_file_content = types.FunctionDeclaration(
     name="get_file_content",
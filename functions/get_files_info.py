@@ -6,7 +6,7 @@ Returns a short text listing each entry with size and directory flag.
 All paths are constrained to the working directory to avoid escape.
 """
 
-import os
+from functions.workspace import get_workspace, WorkspaceError
 from google.genai import types
 
 # - README.md: file_size=1032 bytes, is_dir=False
@@ -14,17 +14,17 @@ from google.genai import types
 # - package.json: file_size=1234 bytes, is_dir=False
 
 def get_files_info(working_directory: str, directory="."):
-    abs_working_dir = os.path.abspath(working_directory)
-    abs_directory = os.path.abspath(os.path.join(working_directory, directory))
-    if not abs_directory.startswith(abs_working_dir):
+    try:
+        contents = get_workspace(working_directory).listdir(directory)
+    except WorkspaceError:
         return f'Error: "{directory}" is not in the working dir'
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        return f'Error: "{directory}" is not a directory'
+    except OSError as e:
+        return f'Error: listing "{directory}": {e}'
     
     final_response = ""
-    contents = os.listdir(abs_directory)
-    for content in contents:
-        content_path = os.path.join(abs_directory, content)
-        is_dir = os.path.isdir(content_path)
-        size = os.path.getsize(content_path)
+    for content, size, is_dir in contents:
         final_response += f"- {content}: file_size={size} bytes, is_dir={is_dir}\n"
     
     return final_response
@@ -0,0 +1,32 @@
+"""
+functions.get_tool_result
+-------------------------
+Read back the full output of an earlier tool call whose result was
+reduced to fit the result budget. Results are returned in pages
+starting at a character offset.
+"""
+
+from google.genai import types
+from config import RESULT_CALL_BUDGET
+from result_shaping import fetch_result
+
+def get_tool_result(handle: str, offset: int = 0, limit: int = RESULT_CALL_BUDGET) -> str:
+    return fetch_result(handle, offset, limit)
+
+schema_get_tool_result = types.FunctionDeclaration(
+    name="get_tool_result",
+    description="Reads the full output of an earlier tool call that was reduced to fit the result budget, one page at a time.",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "handle": types.Schema(
+                type=types.Type.STRING,
+                description="The handle given in the reduced tool result.",
+            ),
+            "offset": types.Schema(
+                type=types.Type.INTEGER,
+                description="Character offset to start reading from. Defaults to 0.",
+            ),
+        },
+    ),
+)
@@ -6,8 +6,8 @@ system Python interpreter. Returns captured stdout/stderr and a brief
 status message. Execution is limited by a timeout to avoid hangs.
 """
 
-import os
 import subprocess
+from functions.workspace import get_workspace, WorkspaceError
 from google.genai import types
 
 def run_python_file(working_directory: str, 
@@ -26,22 +26,23 @@ def run_python_file(working_directory: str,
         str: Combined stdout/stderr and status or an error string.
     """
     
-    abs_working_dir = os.path.abspath(working_directory)
-    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
-    if not abs_file_path.startswith(abs_working_dir):
+    workspace = get_workspace(working_directory)
+    try:
+        if not workspace.is_file(file_path):
+            return f'Error: "{file_path}" is not a file'
+    except WorkspaceError:
         return f'Error: "{file_path}" is not in the working dir'
-    if not os.path.isfile(abs_file_path):
-        return f'Error: "{file_path}" is not a file'
     if not file_path.endswith(".py"):
         return f'Error: "{file_path}" is not a Python file'
     
     try:
-        final_args = ["python", file_path]
+        final_args = ["python", workspace.relpath(file_path)]
         final_args.extend(args)
         output = subprocess.run(final_args,
-                                cwd=abs_working_dir,
+                                cwd=workspace.root,
                                 timeout=30,
-                                capture_output=True
+                                capture_output=True,
+                                text=True
                                 )
         final_string = f"""
 STDOUT: {output.stdout}
@@ -0,0 +1,253 @@
+"""
+functions.workspace
+-------------------
+Shared, directory-fd anchored access to a working directory. The root
+is opened once; every path is normalized lexically (cached) and then
+walked one component at a time with `openat`-style calls and
+`O_NOFOLLOW`, so sibling directories such as `calculator2`, `..`
+escapes and symlinks can never reach outside the root. Only the lexical
+step is cached: what a path resolves to on disk is checked on every
+call, so reads open the file once and check its type on the open fd
+rather than walking the path twice. Platforms without `dir_fd` support
+fall back to `realpath` containment checks.
+"""
+
+import errno
+import os
+import posixpath
+import stat
+import threading
+
+HAS_DIR_FD = os.open in os.supports_dir_fd and hasattr(os, "O_DIRECTORY")
+NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+NONBLOCK = getattr(os, "O_NONBLOCK", 0)
+CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+MAX_CACHED_PATHS = 4096
+
+
+class WorkspaceError(Exception):
+    """Raised when a path resolves outside the working directory."""
+
+
+class Workspace:
+    """
+    A working directory opened once, with containment-checked helpers
+    for the operations the tools in `functions/` need.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+        self.fd = os.open(self.root, os.O_RDONLY | os.O_DIRECTORY | CLOEXEC) if HAS_DIR_FD else None
+        self._parts = {}
+
+    def parts(self, path: str) -> tuple[str, ...]:
+        """Split `path` into normalized components below the root, or raise WorkspaceError."""
+        cached = self._parts.get(path)
+        if cached is not None:
+            if cached is False:
+                raise WorkspaceError(path)
+            return cached
+
+        normalized = path.replace(os.sep, "/")
+        if os.path.isabs(path):
+            normalized = os.path.relpath(os.path.normpath(path), self.root).replace(os.sep, "/")
+        normalized = posixpath.normpath(normalized)
+        if normalized == ".":
+            result = ()
+        elif normalized == ".." or normalized.startswith("../") or normalized.startswith("/"):
+            result = False
+        else:
+            result = tuple(normalized.split("/"))
+
+        if len(self._parts) >= MAX_CACHED_PATHS:
+            self._parts.clear()
+        self._parts[path] = result
+        if result is False:
+            raise WorkspaceError(path)
+        return result
+
+    def relpath(self, path: str) -> str:
+        return "/".join(self.parts(path)) or "."
+
+    def _fallback_path(self, parts: tuple[str, ...]) -> str:
+        full = os.path.join(self.root, *parts)
+        if os.path.commonpath([self.root, os.path.realpath(full)]) != self.root:
+            raise WorkspaceError(full)
+        return full
+
+    @staticmethod
+    def _is_symlink(name: str, dir_fd: int) -> bool:
+        try:
+            return stat.S_ISLNK(os.stat(name, dir_fd=dir_fd, follow_symlinks=False).st_mode)
+        except OSError:
+            return False
+
+    def _open_dir(self, parts: tuple[str, ...], create: bool = False) -> int:
+        """Walks `parts` from the root fd without following symlinks and returns a new dir fd."""
+        fd = self.fd
+        try:
+            for part in parts:
+                if create:
+                    try:
+                        os.mkdir(part, dir_fd=fd)
+                    except FileExistsError:
+                        pass
+                try:
+                    child = os.open(part, os.O_RDONLY | os.O_DIRECTORY | NOFOLLOW | CLOEXEC, dir_fd=fd)
+                except OSError as e:
+                    if e.errno in (errno.ELOOP, errno.EMLINK) or self._is_symlink(part, fd):
+                        raise WorkspaceError(part) from e
+                    raise
+                if fd != self.fd:
+                    os.close(fd)
+                fd = child
+            return os.dup(fd) if fd == self.fd else fd
+        except BaseException:
+            if fd != self.fd:
+                os.close(fd)
+            raise
+
+    def _parent(self, parts: tuple[str, ...], create: bool = False) -> int:
+        """Dir fd of the directory holding `parts[-1]`; the root fd itself is not duplicated."""
+        return self._open_dir(parts[:-1], create) if len(parts) > 1 else self.fd
+
+    def _close_dir(self, fd: int) -> None:
+        if fd != self.fd:
+            os.close(fd)
+
+    def _open_file(self, parts: tuple[str, ...], flags: int, create_dirs: bool = False) -> int:
+        if not parts:
+            raise IsADirectoryError(self.root)
+        parent = self._parent(parts, create=create_dirs)
+        try:
+            return os.open(parts[-1], flags | NOFOLLOW | CLOEXEC, 0o644, dir_fd=parent)
+        except OSError as e:
+            if e.errno in (errno.ELOOP, errno.EMLINK):
+                raise WorkspaceError(parts[-1]) from e
+            raise
+        finally:
+            self._close_dir(parent)
+
+    def is_file(self, path: str) -> bool:
+        """
+        True if `path` is a regular file (not a symlink) inside the root.
+        Like `os.path.isfile`, paths that cannot be stat'ed are not files.
+        """
+        parts = self.parts(path)
+        if not parts:
+            return False
+        if not HAS_DIR_FD:
+            return os.path.isfile(self._fallback_path(parts))
+        try:
+            parent = self._parent(parts)
+        except (OSError, ValueError):
+            return False
+        try:
+            st = os.stat(parts[-1], dir_fd=parent, follow_symlinks=False)
+        except (OSError, ValueError):
+            return False
+        finally:
+            self._close_dir(parent)
+        if stat.S_ISLNK(st.st_mode):
+            raise WorkspaceError(path)
+        return stat.S_ISREG(st.st_mode)
+
+    def read_file(self, path: str, limit: int = -1):
+        """
+        Text of the regular file at `path`, or None if it is not one. The
+        file is opened once and its type checked on the open descriptor.
+        """
+        parts = self.parts(path)
+        if not parts:
+            return None
+        if not HAS_DIR_FD:
+            full = self._fallback_path(parts)
+            if not os.path.isfile(full):
+                return None
+            with open(full, "r") as f:
+                return f.read(limit)
+        try:
+            # O_NONBLOCK keeps a FIFO from blocking the open; regular files ignore it
+            fd = self._open_file(parts, os.O_RDONLY | NONBLOCK)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            return None
+        try:
+            regular = stat.S_ISREG(os.fstat(fd).st_mode)
+        except BaseException:
+            os.close(fd)
+            raise
+        if not regular:
+            os.close(fd)
+            return None
+        with open(fd, "r", closefd=True) as f:
+            return f.read(limit)
+
+    def listdir(self, path: str) -> list[tuple[str, int, bool]]:
+        """Return (name, size, is_dir) for each entry of the directory at `path`."""
+        parts = self.parts(path)
+        if not HAS_DIR_FD:
+            full = self._fallback_path(parts)
+            return [
+                (name, os.path.getsize(os.path.join(full, name)), os.path.isdir(os.path.join(full, name)))
+                for name in os.listdir(full)
+            ]
+        fd = self._open_dir(parts)
+        try:
+            entries = []
+            for name in os.listdir(fd):
+                st = os.stat(name, dir_fd=fd, follow_symlinks=False)
+                entries.append((name, st.st_size, stat.S_ISDIR(st.st_mode)))
+            return entries
+        finally:
+            os.close(fd)
+
+    def read_text(self, path: str, limit: int = -1) -> str:
+        parts = self.parts(path)
+        if not HAS_DIR_FD:
+            with open(self._fallback_path(parts), "r") as f:
+                return f.read(limit)
+        fd = self._open_file(parts, os.O_RDONLY)
+        with open(fd, "r", closefd=True) as f:
+            return f.read(limit)
+
+    def write_text(self, path: str, content: str) -> int:
+        """Create or overwrite the file at `path`, creating parent directories as needed."""
+        parts = self.parts(path)
+        if not HAS_DIR_FD:
+            full = self._fallback_path(parts)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "w") as f:
+                return f.write(content)
+        fd = self._open_file(parts, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, create_dirs=True)
+        with open(fd, "w", closefd=True) as f:
+            return f.write(content)
+
+    def remove(self, path: str) -> None:
+        """Delete the file at `path`; a symlink is removed itself, never its target."""
+        parts = self.parts(path)
+        if not parts:
+            raise IsADirectoryError(self.root)
+        if not HAS_DIR_FD:
+            os.remove(self._fallback_path(parts))
+            return
+        parent = self._parent(parts)
+        try:
+            os.unlink(parts[-1], dir_fd=parent)
+        finally:
+            self._close_dir(parent)
+
+
+_workspaces = {}
+_workspaces_lock = threading.Lock()
+
+
+def get_workspace(working_directory: str) -> Workspace:
+    """Return the shared `Workspace` for `working_directory`, opening it on first use."""
+    workspace = _workspaces.get(working_directory)
+    if workspace is None:
+        with _workspaces_lock:
+            workspace = _workspaces.get(working_directory)
+            if workspace is None:
+                workspace = Workspace(working_directory)
+                _workspaces[working_directory] = workspace
+    return workspace
@@ -6,26 +6,15 @@ parent directories when necessary and returns a concise success or
 error message as a string.
 """
 
-import os
+from functions.workspace import get_workspace, WorkspaceError
 from google.genai import types
 
 def write_file(working_directory, file_path, content):
-    abs_working_dir = os.path.abspath(working_directory)
-    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
-    if not abs_file_path.startswith(abs_working_dir):
-        return f'Error: "{file_path}" is not in the working dir'
-    
-    parent_dir = os.path.dirname(abs_file_path)
-    if not os.path.isdir(parent_dir):
-        try:
-            os.makedirs(parent_dir)
-        except Exception as e:
-            return f'Could not create parent dirs:{parent_dir} = {e}'
     try:
-        with open(abs_file_path, "w") as f:
-            f.write(content)
+        get_workspace(working_directory).write_text(file_path, content)
         return f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
-        
+    except WorkspaceError:
+        return f'Error: "{file_path}" is not in the working dir'
     except Exception as e:
         return f"Failed to write to file: {file_path}, {e}"
 
@@ -16,7 +16,12 @@ from functions.get_files_info import schema_get_files_info
 from functions.get_file_content import schema_get_file_content
 from functions.write_file import schema_write_file
 from functions.run_python_file import schema_run_python_file
-from call_function import call_function
+from functions.get_tool_result import schema_get_tool_result
+from result_shaping import TurnBudget
+from call_function import working_directory
+from session_monitor import SessionMonitor
+from profiling import PROFILER, profiled
+from checkpoint import SessionCheckpoint, new_session_id
 
 class CodingAgent:
     def __init__(
@@ -53,7 +58,8 @@ class CodingAgent:
                 schema_get_files_info,
                 schema_get_file_content,
                 schema_write_file,
-                schema_run_python_file
+                schema_run_python_file,
+                schema_get_tool_result
             ]
         )
         
@@ -62,22 +68,39 @@ class CodingAgent:
             system_instruction=self.system_prompt
         )
 
+    @profiled("session")
     def query(
         self,
         user_prompt: str,
         verbose: bool = False,
+        session_id: str = None,
     ) -> str:
 
-        messages = [
-            types.Content(role='user', parts=[types.Part(text=user_prompt)]),
-        ]
-
-        for i in range(MAX_ITERS):
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=messages,
-                config=self.config
-            )
+        # Resume from the last completed iteration if this session was
+        # checkpointed before, otherwise start a new checkpoint
+        checkpoint = SessionCheckpoint(session_id or new_session_id(), working_directory)
+        if checkpoint.exists():
+            checkpoint.load()
+        if checkpoint.messages:
+            checkpoint.restore_workspace()
+            messages = checkpoint.messages
+            print(f"Resuming session {checkpoint.session_id} at iteration {checkpoint.iterations + 1}")
+        else:
+            messages = [
+                types.Content(role='user', parts=[types.Part(text=user_prompt)]),
+            ]
+            checkpoint.start(messages)
+            print(f"Session ID: {checkpoint.session_id}")
+
+        monitor = SessionMonitor()
+        for i in range(checkpoint.iterations, MAX_ITERS):
+            PROFILER.mark_iteration(i + 1, messages)
+            with PROFILER.section("model"):
+                response = self.client.models.generate_content(
+                    model=self.model,
+                    contents=messages,
+                    config=self.config
+                )
 
             if response is None or response.usage_metadata is None:
                 print("response is malformed")
@@ -94,12 +117,44 @@ class CodingAgent:
                     messages.append(candidate.content)
 
             if response.function_calls:
+                checkpoint.begin_writes([
+                    part.args["file_path"] for part in response.function_calls
+                    if part.name == "write_file" and part.args and "file_path" in part.args
+                ])
+                budget = TurnBudget()
                 for function_call_part in response.function_calls:
-                    result = call_function(function_call_part, verbose)
+                    result = monitor.call(function_call_part, verbose, budget)
                     messages.append(result)
+                if monitor.stop_reason:
+                    stopped = f"Stopped early: {monitor.stop_reason}"
+                    checkpoint.finish()
+                    print(stopped)
+                    return stopped
+                checkpoint.save_iteration(i + 1, messages)
             else:
                 # final agent text message
+                checkpoint.finish()
                 return response.text
+        checkpoint.finish()
+
+def parse_args(argv: list[str]) -> tuple[str, bool, str]:
+    """Return (prompt, verbose, session_id) from a `main.py`-style argv."""
+    if len(argv) < 2:
+        print("give me a prompt")
+        sys.exit(1)
+
+    verbose_flag = "--verbose" in argv[2:]
+
+    # --session <id> resumes a checkpointed session (or starts one under that id)
+    session_id = None
+    if "--session" in argv[2:]:
+        index = argv.index("--session", 2)
+        if index + 1 >= len(argv):
+            print("--session needs a session id")
+            sys.exit(1)
+        session_id = argv[index + 1]
+
+    return argv[1], verbose_flag, session_id
 
 def main():
 
@@ -107,17 +162,11 @@ def main():
     API_KEY = os.environ.get("GEMINI_API_KEY")
     agent = CodingAgent(api_key=API_KEY)
 
-    if len(sys.argv) < 2:
-        print("give me a prompt")
-        sys.exit(1)
-
-    verbose_flag = False
-    if len(sys.argv) == 3 and sys.argv[2] == "--verbose":
-        verbose_flag = True
-
-    prompt = sys.argv[1]
+    prompt, verbose_flag, session_id = parse_args(sys.argv)
+    if "--profile" in sys.argv[2:]:
+        PROFILER.enable("main")
 
-    response = agent.query(user_prompt=prompt, verbose=verbose_flag)
+    response = agent.query(user_prompt=prompt, verbose=verbose_flag, session_id=session_id)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
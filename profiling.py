@@ -0,0 +1,181 @@
+"""
+profiling
+---------
+On-demand profiling for agent sessions, enabled with `--profile` in
+`main.py` and `agent_tests.py`. While enabled, every agent session,
+model call and tool dispatch is a named section: cProfile runs inside
+sections, a sampling thread records their stacks, and each loop
+iteration notes the size of `messages` and tracemalloc's traced memory.
+At exit it writes `<name>.pstats` and a collapsed-stack
+`<name>.collapsed` (flamegraph.pl / speedscope compatible) to
+`PROFILE_DIR` and prints a top-N report splitting session time into
+model, tool and loop overhead.
+"""
+
+import atexit
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from config import PROFILE_DIR, PROFILE_INTERVAL, PROFILE_TOP_N
+
+# The collectors' own allocations would otherwise fill the growth report
+TRACE_FILTERS = [
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+]
+
+
+class Profiler:
+    """
+    Collects section timings, cProfile stats, sampled stacks and
+    `messages` growth. Does nothing until `enable()` is called.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.active = {}  # thread id -> section label stack
+        self.profiles = []
+        self.section_times = defaultdict(float)
+        self.section_counts = Counter()
+        self.iterations = []
+        self.stacks = Counter()
+
+    def enable(self, name: str, directory: str = PROFILE_DIR) -> None:
+        """Starts collection and schedules the report for interpreter exit."""
+        if self.enabled:
+            return
+        self.enabled = True
+        os.makedirs(directory, exist_ok=True)
+        self.output_prefix = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        tracemalloc.start()
+        self.start_snapshot = tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+        threading.Thread(target=self._sample, name="profiler-sampler", daemon=True).start()
+        atexit.register(self.report)
+
+    def section(self, label: str):
+        """Context manager timing and profiling one named section."""
+        if not self.enabled:
+            return nullcontext()
+        return self._section(label)
+
+    @contextmanager
+    def _section(self, label: str):
+        thread_id = threading.get_ident()
+        labels = self.active.setdefault(thread_id, [])
+        outermost = not labels
+        profile = None
+        if outermost:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                profile = None  # Python 3.12+ allows one active cProfile per process
+        labels.append(label)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            labels.pop()
+            with self.lock:
+                self.section_times[label] += elapsed
+                self.section_counts[label] += 1
+            if outermost:
+                if profile is not None:
+                    profile.disable()
+                    with self.lock:
+                        self.profiles.append(profile)
+                del self.active[thread_id]
+
+    def mark_iteration(self, iteration: int, messages: list) -> None:
+        """Records the size of `messages` and traced memory at the start of an iteration."""
+        if not self.enabled:
+            return
+        size = sum(len(json.dumps(m.model_dump(mode="json", exclude_none=True))) for m in messages)
+        with self.lock:
+            self.iterations.append((iteration, len(messages), size, tracemalloc.get_traced_memory()[0]))
+
+    def _sample(self) -> None:
+        while True:
+            time.sleep(PROFILE_INTERVAL)
+            frames = sys._current_frames()
+            for thread_id, labels in list(self.active.items()):
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                with self.lock:
+                    self.stacks[";".join(list(labels) + stack)] += 1
+
+    def report(self) -> None:
+        """Writes the pstats and collapsed-stack files and prints the top-N report."""
+        if not self.section_counts:
+            print("Profile: no profiled sections ran")
+            return
+
+        stream = io.StringIO()
+        stats = pstats.Stats(*self.profiles, stream=stream) if self.profiles else None
+        if stats is not None:
+            stats.dump_stats(f"{self.output_prefix}.pstats")
+        with open(f"{self.output_prefix}.collapsed", "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        print("=" * 60)
+        print("Profile summary")
+        sessions = self.section_times.get("session", 0.0)
+        model = self.section_times.get("model", 0.0)
+        tools = sum(t for label, t in self.section_times.items() if label.startswith("tool:"))
+        for label, total in sorted(self.section_times.items(), key=lambda item: -item[1]):
+            count = self.section_counts[label]
+            print(f"  {label:<28} {total:9.3f}s  {count:5d} calls  {total / count * 1000:9.1f} ms/call")
+        if sessions:
+            overhead = sessions - model - tools
+            print(f"  loop overhead                {overhead:9.3f}s  ({overhead / sessions:.1%} of session time)")
+
+        if self.iterations:
+            print("messages growth (iteration, messages, serialized bytes, traced bytes):")
+            for row in self.iterations[-PROFILE_TOP_N:]:
+                print(f"  {row[0]:4d} {row[1]:6d} {row[2]:12d} {row[3]:14d}")
+
+        print(f"Top {PROFILE_TOP_N} allocation growth:")
+        snapshot = tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+        growth = snapshot.compare_to(self.start_snapshot, "lineno")
+        for stat in growth[:PROFILE_TOP_N]:
+            print(f"  {stat}")
+
+        if stats is not None:
+            print(f"Top {PROFILE_TOP_N} functions by cumulative time:")
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+            print(stream.getvalue().strip())
+        print(f"Wrote profile output to {self.output_prefix}.*")
+
+
+PROFILER = Profiler()
+
+
+def profiled(label: str):
+    """Decorator running the wrapped function as a profiled section."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with PROFILER.section(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
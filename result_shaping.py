@@ -0,0 +1,174 @@
+"""
+result_shaping
+--------------
+Bounds the size of tool results before they are sent back to the
+model. A `TurnBudget` caps every result at `RESULT_CALL_BUDGET`
+characters and all results of one model turn at `RESULT_TURN_BUDGET`,
+using reductions that suit each tool: tracebacks keep their tail,
+repeated output lines are collapsed and directory listings are
+summarized. Full results are kept under a handle that the model can
+read back in pages with the `get_tool_result` tool; pages are charged
+to the same budget. Markers and footers count towards the limits.
+Once a turn's budget is spent, further results are replaced by a
+one-line notice carrying their handle.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from config import RESULT_CALL_BUDGET, RESULT_TURN_BUDGET, RESULT_STORE_SIZE
+
+# Full tool results by handle, oldest evicted first
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def store_result(result: str) -> str:
+    handle = hashlib.sha1(result.encode()).hexdigest()[:10]
+    with _results_lock:
+        _results[handle] = result
+        _results.move_to_end(handle)
+        while len(_results) > RESULT_STORE_SIZE:
+            _results.popitem(last=False)
+    return handle
+
+
+def spent_notice(handle: str) -> str:
+    return f'[Omitted: turn result budget spent; handle "{handle}"]'
+
+
+def fetch_result(handle: str, offset: int = 0, limit: int = RESULT_CALL_BUDGET) -> str:
+    """Return at most `limit` characters of a stored result starting at `offset`, page marker included."""
+    result = _results.get(handle)
+    if result is None:
+        return f'Error: no stored result with handle "{handle}"'
+    offset = max(0, int(offset))
+    if offset >= len(result):
+        return f'[End of result "{handle}" at {len(result)} characters]'
+    if len(result) - offset <= limit:
+        return result[offset:]
+
+    def marker(end):
+        return f'\n[Characters {offset}-{end} of {len(result)}; continue with offset={end}]'
+
+    # The marker is never longer than with end at the full length
+    size = limit - len(marker(len(result)))
+    if size <= 0:
+        return spent_notice(handle)
+    end = offset + size
+    return result[offset:end] + marker(end)
+
+
+def collapse_repeats(text: str) -> str:
+    """Collapse runs of identical consecutive lines into one line with a count."""
+    lines = text.split("\n")
+    collapsed = []
+    i = 0
+    while i < len(lines):
+        j = i
+        while j + 1 < len(lines) and lines[j + 1] == lines[i]:
+            j += 1
+        collapsed.append(lines[i])
+        if j > i:
+            collapsed.append(f"[previous line repeated {j - i} more times]")
+        i = j + 1
+    return "\n".join(collapsed)
+
+
+def head_tail(text: str, limit: int, head_share: float = 0.5) -> str:
+    if len(text) <= limit:
+        return text
+    keep = limit - len(f"\n[... {len(text)} characters omitted ...]\n")
+    if keep <= 0:
+        return text[:limit]
+    head = int(keep * head_share)
+    tail = keep - head
+    skipped = len(text) - head - tail
+    return text[:head] + f"\n[... {skipped} characters omitted ...]\n" + (text[-tail:] if tail else "")
+
+
+def reduce_output(text: str, limit: int) -> str:
+    """Program output: collapse repeats, then favour the tail when it holds a traceback."""
+    text = collapse_repeats(text)
+    head_share = 0.2 if "Traceback (most recent call last)" in text else 0.5
+    return head_tail(text, limit, head_share)
+
+
+def reduce_listing(text: str, limit: int) -> str:
+    """Directory listing: keep the entries that fit and summarize the rest."""
+    entries = [line for line in text.split("\n") if line]
+    kept = []
+    used = 0
+    for entry in entries:
+        if used + len(entry) + 1 > limit * 0.8:
+            break
+        kept.append(entry)
+        used += len(entry) + 1
+
+    while True:
+        rest = entries[len(kept):]
+        lines = list(kept)
+        if rest:
+            dirs = sum(1 for entry in rest if entry.endswith("is_dir=True"))
+            total = sum(int(m.group(1)) for m in map(re.compile(r"file_size=(\d+)").search, rest) if m)
+            lines.append(f"[... {len(rest)} more entries: {len(rest) - dirs} files, {dirs} dirs, {total} bytes]")
+        reduced = "\n".join(lines) + "\n"
+        if len(reduced) <= limit:
+            return reduced
+        if not kept:
+            return head_tail(reduced, limit)
+        kept.pop()
+
+
+REDUCERS = {
+    "run_python_file": reduce_output,
+    "get_files_info": reduce_listing,
+    "get_file_content": lambda text, limit: head_tail(text, limit, head_share=1.0),
+}
+
+
+class TurnBudget:
+    """
+    Size budget shared by the tool results of one model turn.
+    """
+
+    def __init__(self, turn_chars: int = RESULT_TURN_BUDGET, call_chars: int = RESULT_CALL_BUDGET):
+        self.remaining = turn_chars
+        self.call_chars = call_chars
+
+    @property
+    def limit(self) -> int:
+        """Characters the next result of this turn may use."""
+        return min(self.call_chars, self.remaining)
+
+    def charge(self, result: str) -> str:
+        """Deducts a result that is already within `limit` from the turn budget."""
+        self.remaining = max(0, self.remaining - len(result))
+        return result
+
+    def shape(self, name: str, result: str) -> str:
+        """
+        Reduces a tool result to fit the per-call and remaining per-turn budget.
+
+        Args:
+            name (str): The tool that produced the result.
+            result (str): The full tool result.
+
+        Returns:
+            str: The result, a reduced version ending with its retrieval
+                handle, or only a short notice with the handle once the
+                turn's budget is spent.
+        """
+        limit = self.limit
+        if len(result) > limit:
+            handle = store_result(result)
+            footer = (f'\n[Result reduced from {len(result)} characters; call get_tool_result '
+                      f'with handle "{handle}" to read the full output]')
+            if limit <= len(footer):
+                result = spent_notice(handle)
+            else:
+                reducer = REDUCERS.get(name, head_tail)
+                result = reducer(result, limit - len(footer)) + footer
+        return self.charge(result)
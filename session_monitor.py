@@ -0,0 +1,114 @@
+"""
+session_monitor
+---------------
+Per-session stall and loop detection for the agent's tool calls. A
+`SessionMonitor` sits in front of `call_function`: repeated reads are
+answered from a memo table of full results, shaped again to the
+current turn's budget, writes that would not change a
+file are skipped, and once too many repeated, no-op or failed calls
+happen without the workspace changing it either warns the model (policy
+"warn") or ends the session early with a reason (policy "stop").
+"""
+
+import json
+
+from config import STALL_LIMIT, STALL_POLICY
+from call_function import run_tool, tool_content, working_directory
+from result_shaping import TurnBudget
+from functions.workspace import get_workspace
+from google.genai import types
+
+# get_tool_result pages are sized to the turn's budget, so they are fetched again instead
+MEMO_TOOLS = {"get_files_info", "get_file_content"}
+
+
+class SessionMonitor:
+    """
+    Tracks the tool calls of one agent session since the workspace last
+    changed.
+    """
+
+    def __init__(self, policy: str = STALL_POLICY, limit: int = STALL_LIMIT):
+        """
+        Initializes the SessionMonitor.
+
+        Args:
+            policy (str): "warn" to add a warning to tool results, "stop" to end the session.
+            limit (int): Repeated, no-op or failed write calls tolerated before the policy applies.
+        """
+        if policy not in ("warn", "stop"):
+            raise ValueError(f"Unknown stall policy: {policy}")
+        self.policy = policy
+        self.limit = limit
+        self.memo = {}
+        self.seen = set()
+        self.unproductive = 0
+        self.stop_reason = None
+
+    def is_noop_write(self, args: dict) -> bool:
+        """True if write_file would leave the target file unchanged."""
+        workspace = get_workspace(working_directory)
+        try:
+            path = args["file_path"]
+            return workspace.is_file(path) and workspace.read_text(path) == args["content"]
+        except Exception:
+            return False
+
+    def call(self, function_call_part, verbose=False, budget=None) -> types.Content:
+        """
+        Runs a tool call through the memo table and no-op check, then
+        applies the stall policy.
+
+        Args:
+            function_call_part: The function-call object returned by the LLM.
+            verbose (bool): If True, prints extra debugging information.
+            budget (TurnBudget, optional): Result size budget for the current turn.
+
+        Returns:
+            types.Content: The tool response, possibly carrying a stall warning.
+        """
+        name = function_call_part.name
+        args = function_call_part.args or {}
+        key = (name, json.dumps(args, sort_keys=True, default=str))
+        repeated = key in self.seen
+        self.seen.add(key)
+        budget = budget or TurnBudget()
+
+        if name == "write_file" and self.is_noop_write(args):
+            print(f" - Skipping no-op call: {name}")
+            self.unproductive += 1
+            result = tool_content(name, f'"{args["file_path"]}" already has this content; nothing was written', budget)
+        elif repeated and key in self.memo:
+            print(f" - Reusing result of repeated call: {name}")
+            self.unproductive += 1
+            result = tool_content(name, self.memo[key], budget)
+        else:
+            output = run_tool(function_call_part, verbose, budget)
+            result = tool_content(name, output, budget)
+            if repeated:
+                self.unproductive += 1
+            if name in MEMO_TOOLS:
+                self.memo[key] = output
+            elif name == "write_file":
+                if output.startswith("Successfully wrote"):
+                    # The workspace changed: earlier reads are stale and repeats are progress again
+                    self.memo.clear()
+                    self.seen.clear()
+                    self.unproductive = 0
+                elif not repeated:
+                    self.unproductive += 1
+            else:
+                self.memo.clear()
+
+        if self.unproductive < self.limit:
+            return result
+
+        reason = f"{self.unproductive} repeated, no-op or failed tool calls without changing the workspace"
+        if self.policy == "stop":
+            self.stop_reason = reason
+            return result
+        result.parts[0].function_response.response["warning"] = (
+            f"{reason}. Stop repeating calls whose results you already have; "
+            f"change the code or give your final answer."
+        )
+        return result